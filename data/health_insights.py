@@ -7,21 +7,62 @@ parses the encoded Value fields, and prints a consolidated health report:
 steps, calories, heart rate, sleep, SpO2, sport sessions, stand reminders.
 """
 
+import csv
 import re
-from datetime import datetime
 from pathlib import Path
 
 import pandas as pd
 
 
-# --- Helpers for encoded Value strings (device uses +AF8- = underscore, :N for numbers) ---
+# --- Helpers for encoded Value strings (device uses +AF8- = underscore, +ACIAIg- = quote, :N for numbers) ---
+# The loaders decode those two escapes in the Value column once, so the patterns below match plain text.
+
+# Patterns are compiled once at import; the parsers below run them on every row.
+_RE_FIRST_NUM = re.compile(r":(\d+)")
+# First bpm and first steps value of a row, each optional, captured in a single search
+_RE_BPM_STEPS = re.compile(r'^(?:(?=.*?bpm":(?P<bpm>\d+)))?(?:(?=.*?steps":(?P<steps>\d+)))?')
+# Every numeric field is "<key>":<n>
+_RE_KV = re.compile(r'(\w+)":(\d+)')
+_SPORT_KEYS = ["calories", "total_cal", "duration", "avg_hrm", "max_hrm", "vitality"]
+
+
+def _decode_values(values):
+    """Decode the +AF8- (underscore) and +ACIAIg- (quote) escapes of a Value column, vectorized."""
+    return values.astype(str).str.replace("+AF8-", "_", regex=False).str.replace("+ACIAIg-", '"', regex=False)
+
 
 def extract_first_number(value_str):
     """First number after a colon in the Value string."""
     if pd.isna(value_str):
         return 0
-    m = re.search(r":(\d+)", str(value_str))
-    return int(m.group(1)) if m else 0
+    return _grab(_RE_FIRST_NUM, str(value_str))
+
+
+def _grab(rx, s, default=0):
+    """Integer captured by a compiled pattern in s (one search), else default."""
+    m = rx.search(s)
+    return int(m.group(1)) if m else default
+
+
+def _kv(s):
+    """All key:number fields of a Value string in one regex pass; the first occurrence of a key wins."""
+    return {k: int(n) for k, n in reversed(_RE_KV.findall(s))}
+
+
+def _kv_frame(values, keys):
+    """Vectorized _kv over a string Series: one float column per requested key, NaN where absent."""
+    values = values.reset_index(drop=True)
+    pairs = values.str.extractall(_RE_KV)
+    pairs.index = pairs.index.droplevel("match")
+    pairs.columns = ["key", "num"]
+    pairs = pairs[~pairs.set_index("key", append=True).index.duplicated()]
+    wide = pairs.pivot(columns="key", values="num")
+    return wide.reindex(index=values.index, columns=keys).apply(pd.to_numeric)
+
+
+def _utc_strftime(seconds, fmt):
+    """Format a Series of Unix timestamps (seconds, UTC) with fmt, vectorized."""
+    return pd.to_datetime(seconds.astype("int64"), unit="s", utc=True).dt.strftime(fmt)
 
 
 # --- Data paths (run from repo root or data/) ---
@@ -37,37 +78,34 @@ def data_dir():
 
 def _read_csv_value_in_middle(path, num_fixed_start=3, num_fixed_end=1):
     """Read CSV where one field (Value) contains commas; Value is between fixed start and end columns.
-    Returns list of dicts with keys from header; Value = everything between start and end columns.
+    Returns a DataFrame of strings with columns from the header; Value = everything between start and end columns.
     Header: first line. Each row: parts[0:num_fixed_start], Value=join(parts[num_fixed_start:-num_fixed_end]), parts[-num_fixed_end:].
+    Lines are read whole by pandas' C parser (NUL separator, no quoting) and split column-wise.
     """
-    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-        lines = [line.strip() for line in f if line.strip()]
-    if not lines:
-        return []
-    header = lines[0].split(",")
+    try:
+        lines = pd.read_csv(
+            path, sep="\0", header=None, names=["_raw"], dtype=str, quoting=csv.QUOTE_NONE,
+            na_filter=False, encoding="utf-8", encoding_errors="ignore",
+        )["_raw"].str.strip()
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame()
+    lines = lines[lines != ""]
+    if lines.empty:
+        return pd.DataFrame()
+    header = lines.iloc[0].split(",")
     # Header has 5 names but Value may contain commas; we use structure: first 3, last 1, middle=Value
-    rows = []
-    for line in lines[1:]:
-        parts = line.split(",")
-        if len(parts) < num_fixed_start + num_fixed_end:
-            continue
-        start_vals = parts[:num_fixed_start]
-        end_vals = parts[-num_fixed_end:]
-        value_str = ",".join(parts[num_fixed_start : -num_fixed_end])
-        if len(header) == 5:
-            row = {
-                header[0]: start_vals[0],
-                header[1]: start_vals[1],
-                header[2]: start_vals[2],
-                "Value": value_str,
-                header[4]: end_vals[0],
-            }
-        else:
-            row = dict(zip(header[:num_fixed_start], start_vals))
-            row["Value"] = value_str
-            row[header[-1]] = end_vals[0]
-        rows.append(row)
-    return rows
+    body = lines.iloc[1:]
+    body = body[body.str.count(",") >= num_fixed_start + num_fixed_end - 1]
+    if body.empty:
+        return pd.DataFrame()
+    head = body.str.split(",", n=num_fixed_start, expand=True)
+    # Leading comma so rows with an empty Value still split into num_fixed_end + 1 pieces
+    tail = ("," + head[num_fixed_start]).str.rsplit(",", n=num_fixed_end, expand=True)
+    cols = {name: head[i] for i, name in enumerate(header[:num_fixed_start])}
+    cols["Value"] = tail[0].str[1:]
+    for i, name in enumerate(header[-num_fixed_end:], 1):
+        cols[name] = tail[i]
+    return pd.DataFrame(cols).reset_index(drop=True)
 
 
 def load_aggregated(data_path):
@@ -75,58 +113,54 @@ def load_aggregated(data_path):
     if not path.exists():
         return pd.DataFrame()
     # Value contains commas; pandas would truncate. Parse manually: Tag,Key,Time, Value..., UpdateTime
-    rows = _read_csv_value_in_middle(path, num_fixed_start=3, num_fixed_end=1)
-    if not rows:
-        return pd.DataFrame()
-    df = pd.DataFrame(rows)
+    df = _read_csv_value_in_middle(path, num_fixed_start=3, num_fixed_end=1)
+    if df.empty:
+        return df
     df["Time"] = pd.to_numeric(df["Time"], errors="coerce")
     df = df.dropna(subset=["Time"])
-    df["Date"] = df["Time"].apply(
-        lambda x: datetime.utcfromtimestamp(int(x)).strftime("%Y-%m-%d")
-    )
+    df["Date"] = _utc_strftime(df["Time"], "%Y-%m-%d")
+    df["Value"] = _decode_values(df["Value"])
     return df
 
 
 # --- Steps/calories from aggregated (correct parsing) ---
 
 def parse_steps_row(value_str):
-    """Value for Key=steps is like ...calories+ACIAIg-:101,+ACIAIg-distance+ACIAIg-:1715,+ACIAIg-steps+ACIAIg-:2276."""
+    """Decoded Value for Key=steps is like ...calories":101,"distance":1715,"steps":2276."""
     if pd.isna(value_str):
         return 0, 0, 0
-    s = str(value_str)
-    cal = re.search(r"calories\+ACIAIg-:(\d+)", s)
-    dist = re.search(r"distance\+ACIAIg-:(\d+)", s)
-    steps = re.search(r"steps\+ACIAIg-:(\d+)", s)
-    return (
-        int(steps.group(1)) if steps else 0,
-        int(dist.group(1)) if dist else 0,
-        int(cal.group(1)) if cal else 0,
-    )
+    d = _kv(str(value_str))
+    return d.get("steps", 0), d.get("distance", 0), d.get("calories", 0)
 
 
 def build_daily_summary(agg_df):
     """Build clean daily summary from aggregated CSV."""
-    report = agg_df[agg_df["Tag"] == "daily+AF8-report"].copy()
+    # Derived columns are built as standalone Series; the filtered frame is only read, never copied
+    report = agg_df[agg_df["Tag"] == "daily+AF8-report"]
     if report.empty:
         return pd.DataFrame()
 
-    report["KeyNorm"] = report["Key"].str.replace(r"\+AF8\-", "_", regex=True)
-    report["Time"] = pd.to_numeric(report["Time"], errors="coerce")
-    report["Date"] = report["Time"].apply(
-        lambda x: datetime.utcfromtimestamp(int(x)).strftime("%Y-%m-%d")
-    )
+    key_norm = report["Key"].str.replace("+AF8-", "_", regex=False)
+    if "Date" in report.columns:  # already derived from Time by load_aggregated
+        dates = report["Date"]
+    else:
+        dates = _utc_strftime(pd.to_numeric(report["Time"], errors="coerce"), "%Y-%m-%d")
+
+    # First Value per (day, key), in file order: one pass instead of a mask per day and key
+    first = pd.DataFrame({"Date": dates, "KeyNorm": key_norm, "Value": report["Value"]})
+    first = first.drop_duplicates(["Date", "KeyNorm"])
+    values = dict(zip(zip(first["Date"], first["KeyNorm"]), first["Value"]))
 
-    days = sorted(report["Date"].unique())
+    days = sorted(dates.unique())
     rows = []
 
     for day in days:
-        d = report[report["Date"] == day]
         row = {"Date": day}
 
         # Steps
-        s = d[d["KeyNorm"] == "steps"]
-        if not s.empty:
-            st, dist, cal = parse_steps_row(s["Value"].iloc[0])
+        v = values.get((day, "steps"))
+        if v is not None:
+            st, dist, cal = parse_steps_row(v)
             row["Steps"] = st
             row["Distance_m"] = dist
             row["Steps_cal"] = cal
@@ -134,48 +168,38 @@ def build_daily_summary(agg_df):
             row["Steps"] = row["Distance_m"] = row["Steps_cal"] = 0
 
         # Calories (daily)
-        c = d[d["KeyNorm"] == "calories"]
-        row["Calories"] = extract_first_number(c["Value"].iloc[0]) if not c.empty else 0
+        v = values.get((day, "calories"))
+        row["Calories"] = extract_first_number(v) if v is not None else 0
 
         # Stand
-        v = d[d["KeyNorm"] == "valid_stand"]
-        row["Stand_count"] = extract_first_number(v["Value"].iloc[0]) if not v.empty else 0
+        v = values.get((day, "valid_stand"))
+        row["Stand_count"] = extract_first_number(v) if v is not None else 0
 
         # Intensity
-        i = d[d["KeyNorm"] == "intensity"]
-        row["Intensity_min"] = extract_first_number(i["Value"].iloc[0]) if not i.empty else 0
+        v = values.get((day, "intensity"))
+        row["Intensity_min"] = extract_first_number(v) if v is not None else 0
 
         # Heart rate
-        hr = d[d["KeyNorm"] == "heart_rate"]
-        if not hr.empty:
-            v = hr["Value"].iloc[0]
-            row["HR_avg"] = int(re.search(r"avg\+AF8-hr\+ACIAIg-:(\d+)", str(v)).group(1)) if re.search(r"avg\+AF8-hr\+ACIAIg-:(\d+)", str(v)) else 0
-            row["HR_min"] = int(re.search(r"min\+AF8-hr\+ACIAIg-:(\d+)", str(v)).group(1)) if re.search(r"min\+AF8-hr\+ACIAIg-:(\d+)", str(v)) else 0
-            row["HR_max"] = int(re.search(r"max\+AF8-hr\+ACIAIg-:(\d+)", str(v)).group(1)) if re.search(r"max\+AF8-hr\+ACIAIg-:(\d+)", str(v)) else 0
-            rhr = re.search(r"avg\+AF8-rhr\+ACIAIg-:(\d+)", str(v))
-            row["HR_resting"] = int(rhr.group(1)) if rhr else 0
-        else:
-            row["HR_avg"] = row["HR_min"] = row["HR_max"] = row["HR_resting"] = 0
+        hr = _kv(str(values.get((day, "heart_rate"), "")))
+        row["HR_avg"] = hr.get("avg_hr", 0)
+        row["HR_min"] = hr.get("min_hr", 0)
+        row["HR_max"] = hr.get("max_hr", 0)
+        row["HR_resting"] = hr.get("avg_rhr", 0)
 
         # Sleep
-        sl = d[d["KeyNorm"] == "sleep"]
-        if not sl.empty:
-            v = sl["Value"].iloc[0]
-            row["Sleep_total_min"] = int(re.search(r"total\+AF8-duration\+ACIAIg-:(\d+)", str(v)).group(1)) if re.search(r"total\+AF8-duration\+ACIAIg-:(\d+)", str(v)) else extract_first_number(v)
-            row["Sleep_score"] = int(re.search(r"sleep\+AF8-score\+ACIAIg-:(\d+)", str(v)).group(1)) if re.search(r"sleep\+AF8-score\+ACIAIg-:(\d+)", str(v)) else 0
-            row["Sleep_deep_min"] = int(re.search(r"sleep\+AF8-deep\+AF8-duration\+ACIAIg-:(\d+)", str(v)).group(1)) if re.search(r"sleep\+AF8-deep\+AF8-duration\+ACIAIg-:(\d+)", str(v)) else 0
-            row["Sleep_light_min"] = int(re.search(r"sleep\+AF8-light\+AF8-duration\+ACIAIg-:(\d+)", str(v)).group(1)) if re.search(r"sleep\+AF8-light\+AF8-duration\+ACIAIg-:(\d+)", str(v)) else 0
+        v = values.get((day, "sleep"))
+        if v is not None:
+            v = str(v)
+            sl = _kv(v)
+            row["Sleep_total_min"] = sl["total_duration"] if "total_duration" in sl else _grab(_RE_FIRST_NUM, v)
+            row["Sleep_score"] = sl.get("sleep_score", 0)
+            row["Sleep_deep_min"] = sl.get("sleep_deep_duration", 0)
+            row["Sleep_light_min"] = sl.get("sleep_light_duration", 0)
         else:
             row["Sleep_total_min"] = row["Sleep_score"] = row["Sleep_deep_min"] = row["Sleep_light_min"] = 0
 
         # SpO2
-        sp = d[d["KeyNorm"] == "spo2"]
-        if not sp.empty:
-            v = sp["Value"].iloc[0]
-            m = re.search(r"avg\+AF8-spo2\+ACIAIg-:(\d+)", str(v))
-            row["SpO2_avg"] = int(m.group(1)) if m else 0
-        else:
-            row["SpO2_avg"] = 0
+        row["SpO2_avg"] = _kv(str(values.get((day, "spo2"), ""))).get("avg_spo2", 0)
 
         rows.append(row)
 
@@ -189,38 +213,37 @@ def load_sport_record(data_path):
     if not path.exists():
         return pd.DataFrame()
     # Value contains commas; parse manually: Key,Time,Category, Value..., UpdateTime
-    rows = _read_csv_value_in_middle(path, num_fixed_start=3, num_fixed_end=1)
-    if not rows:
-        return pd.DataFrame()
-    df = pd.DataFrame(rows)
-    return df.astype(str)
+    df = _read_csv_value_in_middle(path, num_fixed_start=3, num_fixed_end=1)
+    if df.empty:
+        return df
+    df = df.astype(str)
+    df["Value"] = _decode_values(df["Value"])
+    return df
 
 
 def parse_sport_sessions(sport_df):
     """Parse sport record into list of session dicts (calories, duration, avg_hr, vitality, date)."""
     if sport_df.empty or "Value" not in sport_df.columns:
         return []
-    sessions = []
-    for _, row in sport_df.iterrows():
-        v = str(row.get("Value", ""))
-        t = row.get("Time")
-        date_str = datetime.utcfromtimestamp(int(t)).strftime("%Y-%m-%d %H:%M") if t and str(t).isdigit() else ""
-
-        cal = re.search(r"calories\+ACIAIg-:(\d+)", v) or re.search(r"total\+AF8-cal\+ACIAIg-:(\d+)", v)
-        dur = re.search(r"duration\+ACIAIg-:(\d+)", v)
-        avg_hr = re.search(r"avg\+AF8-hrm\+ACIAIg-:(\d+)", v)
-        max_hr = re.search(r"max\+AF8-hrm\+ACIAIg-:(\d+)", v)
-        vitality = re.search(r"vitality\+ACIAIg-:(\d+)", v)
-
-        sessions.append({
-            "Date": date_str,
-            "Calories": int(cal.group(1)) if cal else 0,
-            "Duration_sec": int(dur.group(1)) if dur else 0,
-            "Avg_HR": int(avg_hr.group(1)) if avg_hr else 0,
-            "Max_HR": int(max_hr.group(1)) if max_hr else 0,
-            "Vitality": int(vitality.group(1)) if vitality else 0,
-        })
-    return sessions
+    kv = _kv_frame(sport_df["Value"].astype(str), _SPORT_KEYS)
+    kv["calories"] = kv["calories"].fillna(kv["total_cal"])
+    kv = kv.fillna(0).astype("int64")
+
+    t = sport_df["Time"].astype(str) if "Time" in sport_df.columns else pd.Series("", index=sport_df.index)
+    ok = t.str.isdigit()
+    dates = pd.Series("", index=sport_df.index, dtype=object)
+    if ok.any():
+        dates[ok] = _utc_strftime(pd.to_numeric(t[ok]), "%Y-%m-%d %H:%M")
+
+    sessions = pd.DataFrame({
+        "Date": dates.to_numpy(),
+        "Calories": kv["calories"].to_numpy(),
+        "Duration_sec": kv["duration"].to_numpy(),
+        "Avg_HR": kv["avg_hrm"].to_numpy(),
+        "Max_HR": kv["max_hrm"].to_numpy(),
+        "Vitality": kv["vitality"].to_numpy(),
+    })
+    return sessions.to_dict("records")
 
 
 # --- Raw fitness (heart rate, steps) ---
@@ -229,9 +252,11 @@ def load_fitness(data_path):
     path = data_path / "hlth_center_fitness_data.csv"
     if not path.exists():
         return pd.DataFrame()
-    df = pd.read_csv(path, on_bad_lines="skip", engine="python")
+    df = pd.read_csv(path, on_bad_lines="skip")
     df["Time"] = pd.to_numeric(df["Time"], errors="coerce")
     df = df.dropna(subset=["Time"])
+    if "Value" in df.columns:
+        df["Value"] = _decode_values(df["Value"])
     return df
 
 
@@ -239,28 +264,22 @@ def summarize_fitness(fitness_df):
     """Summarize raw fitness: HR stats, step count from keys heart_rate, steps, calories."""
     if fitness_df.empty:
         return {}
-    df = fitness_df.copy()
-    df["KeyNorm"] = df["Key"].str.replace(r"\+AF8\-", "_", regex=True)
-
-    hr = df[df["KeyNorm"] == "heart_rate"]
-    out = {"heart_rate_records": len(hr)}
-    if not hr.empty:
-        bpms = []
-        for v in hr["Value"]:
-            m = re.search(r"bpm\+ACIAIg-:(\d+)", str(v))
-            if m:
-                bpms.append(int(m.group(1)))
-        if bpms:
-            out["HR_avg"] = sum(bpms) / len(bpms)
-            out["HR_min"] = min(bpms)
-            out["HR_max"] = max(bpms)
-
-    steps_df = df[df["KeyNorm"] == "steps"]
-    total_steps = 0
-    for v in steps_df["Value"]:
-        m = re.search(r"steps\+ACIAIg-:(\d+)", str(v))
-        if m:
-            total_steps += int(m.group(1))
+    key_norm = fitness_df["Key"].str.replace("+AF8-", "_", regex=False)
+    is_hr = (key_norm == "heart_rate").to_numpy()
+    is_steps = (key_norm == "steps").to_numpy()
+
+    # One extract over the HR and steps rows yields both the bpm and the steps column
+    wanted = is_hr | is_steps
+    nums = fitness_df.loc[wanted, "Value"].astype(str).str.extract(_RE_BPM_STEPS).astype("float64")
+
+    out = {"heart_rate_records": int(is_hr.sum())}
+    bpms = nums.loc[is_hr[wanted], "bpm"].dropna().astype("int64")
+    if not bpms.empty:
+        out["HR_avg"] = bpms.sum() / len(bpms)
+        out["HR_min"] = int(bpms.min())
+        out["HR_max"] = int(bpms.max())
+
+    total_steps = int(nums.loc[is_steps[wanted], "steps"].fillna(0).sum())
     out["Steps_total_raw"] = total_steps
     return out
 
@@ -13,9 +13,16 @@ be used as model.tflite in app assets with no code changes.
 Usage:
   python ml/export_to_tflite.py
   python ml/export_to_tflite.py --use_keras_only
+  python ml/export_to_tflite.py --use_keras_only --no_distill   # train on hard labels only
+  python ml/export_to_tflite.py --use_keras_only --full_vocab   # keep the full tokenizer vocab
+  python ml/export_to_tflite.py --use_keras_only --qat   # quantization-aware training before int8 export
   python ml/export_to_tflite.py --for_mediapipe   # output: model.tflite for Android assets
+  python ml/export_to_tflite.py --numeric_features   # MLP on parsed vitals (no tokenizer on device)
 """
 import argparse
+import json
+import os
+import re
 import shutil
 import subprocess
 import sys
@@ -24,21 +31,43 @@ from pathlib import Path
 REPO_ROOT = Path(__file__).resolve().parent.parent
 SAVED_MODEL = REPO_ROOT / "ml" / "saved_model"
 TFLITE_DIR = REPO_ROOT / "ml" / "tflite"
+ENCODE_CACHE_DIR = TFLITE_DIR / "_cache"
 ANDROID_ASSETS = REPO_ROOT / "android" / "elixirtecho" / "app" / "src" / "main" / "assets"
 DATASET_CSV = REPO_ROOT / "data" / "health_risk_dataset.csv"
+# Tokenizer id -> pruned embedding row for health_risk_classifier*.tflite (see _prune_vocab)
+VOCAB_MAP_JSON = TFLITE_DIR / "vocab_map.json"
+# Embedding + dense weights of the MediaPipe model for the numpy reference (run_mediapipe_tflite_test.py --numpy_probe)
+PROBE_WEIGHTS = TFLITE_DIR / "probe_weights.npz"
 MAX_LEN = 64
+# Rows of the tokenized dataset used to calibrate int8 activation ranges
+REP_SAMPLES = 100
+VAL_SPLIT = 0.15
+# Knowledge distillation from the fine-tuned MobileBERT: softmax temperature and weight of the soft-label term
+DISTILL_T = 2.0
+DISTILL_ALPHA = 0.7
+BATCH_SIZE = 8
+# XLA-compile the Keras train step (faster export-time training only: TFLite conversion traces
+# the plain Keras graph, so the exported .tflite is the same either way)
+KERAS_JIT_COMPILE = True
 RISK_LABELS = ["green", "yellow", "red"]
 NUM_LABELS = len(RISK_LABELS)
+LABEL_TO_ID = {name: i for i, name in enumerate(RISK_LABELS)}
 # BERT-style input names expected by MediaPipe TextClassifier
 INPUT_IDS_NAME = "ids"
 INPUT_MASK_NAME = "mask"
 INPUT_SEGMENT_IDS_NAME = "segment_ids"
 OUTPUT_LOGITS_NAME = "logits"
-
-
-def risk_to_id(risk: str) -> int:
-    r = str(risk).strip().lower()
-    return RISK_LABELS.index(r) if r in RISK_LABELS else 0
+# --numeric_features: vitals parsed from the dataset text (build_health_risk_dataset.vitals_to_text), 0 if absent.
+# sleep_h is "sleep <h>h<m>m" in hours; the patterns are shipped in numeric_features.json for the app.
+NUMERIC_FIELD_RES = {
+    "hr_avg": re.compile(r"HR average (\d+)"),
+    "hr_max": re.compile(r"HR max (\d+)"),
+    "spo2": re.compile(r"SpO2 (\d+)"),
+    "steps": re.compile(r"steps (\d+)"),
+    "active_min": re.compile(r"active (\d+) minutes"),
+    "sleep_h": re.compile(r"sleep (\d+)h(?:(\d+)m)?"),
+}
+NUMERIC_FEATURES = list(NUMERIC_FIELD_RES)
 
 
 def try_optimum_export() -> bool:
@@ -51,13 +80,13 @@ def try_optimum_export() -> bool:
         [sys.executable, "-m", "optimum_cli", "export", "tflite", "--model", str(SAVED_MODEL), "--task", "text-classification", "--sequence_length", str(MAX_LEN), str(TFLITE_DIR)],
     ):
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300, cwd=str(REPO_ROOT))
-            if result.returncode == 0:
+            returncode, tail = _run_keep_output_tail(cmd, timeout=300)
+            if returncode == 0:
                 print("Optimum export succeeded.")
                 _copy_tokenizer_and_labels()
                 return True
             print("Optimum TFLite export failed (TF MobileBERT may be unavailable):")
-            print(result.stderr or result.stdout)
+            print("".join(tail))
         except FileNotFoundError:
             continue
         except subprocess.TimeoutExpired:
@@ -65,16 +94,43 @@ def try_optimum_export() -> bool:
     return False
 
 
+def _run_keep_output_tail(cmd, timeout: float, keep: int = 200):
+    """
+    Run cmd with stderr merged into stdout and that stream drained line by line into a bounded
+    deque, so a chatty export never buffers its whole log but errors printed to either stream
+    are kept. Returns (returncode, last keep lines).
+    """
+    import threading
+    from collections import deque
+
+    tail = deque(maxlen=keep)
+    proc = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, cwd=str(REPO_ROOT)
+    )
+    reader = threading.Thread(target=lambda: tail.extend(proc.stdout), daemon=True)
+    reader.start()
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        raise
+    finally:
+        reader.join(timeout=5)
+    return proc.returncode, list(tail)
+
+
 def _copy_tokenizer_and_labels():
     """Copy tokenizer from SAVED_MODEL to TFLITE_DIR and write labels.txt."""
     if not SAVED_MODEL.exists():
         return
     try:
         from transformers import AutoTokenizer
-        tokenizer = AutoTokenizer.from_pretrained(str(SAVED_MODEL))
+        tokenizer = AutoTokenizer.from_pretrained(str(SAVED_MODEL), use_fast=True)
         TFLITE_DIR.mkdir(parents=True, exist_ok=True)
         tokenizer.save_pretrained(str(TFLITE_DIR))
         (TFLITE_DIR / "labels.txt").write_text("\n".join(RISK_LABELS))
+        VOCAB_MAP_JSON.unlink(missing_ok=True)  # Optimum model takes raw tokenizer ids
     except Exception as e:
         print("Could not copy tokenizer:", e)
 
@@ -87,20 +143,265 @@ def _write_vocab_txt(tokenizer, out_path: Path) -> None:
         vocab_dict = getattr(tokenizer, "vocab", {}) or {}
     default_size = getattr(tokenizer, "vocab_size", 30522) or 30522
     size = max(default_size, max(vocab_dict.values()) + 1) if vocab_dict else default_size
-    id_to_token = {v: k for k, v in vocab_dict.items()}
-    lines = [id_to_token.get(i, f"[unused{i}]") for i in range(size)]
+    # Fill a preallocated id-indexed list; ids missing from the vocab keep their [unusedN] placeholder
+    lines = [f"[unused{i}]" for i in range(size)]
+    for token, i in vocab_dict.items():
+        if 0 <= i < size:
+            lines[i] = token
     out_path.parent.mkdir(parents=True, exist_ok=True)
     out_path.write_text("\n".join(lines), encoding="utf-8")
 
 
-def export_keras_to_tflite() -> bool:
+def _read_dataset():
+    """text and risk_level columns of DATASET_CSV (pyarrow CSV engine when available)."""
+    import pandas as pd
+
+    cols = ["text", "risk_level"]
+    try:
+        return pd.read_csv(DATASET_CSV, engine="pyarrow", usecols=cols)
+    except (ImportError, ValueError):
+        return pd.read_csv(DATASET_CSV, usecols=cols)
+
+
+def _label_ids(risk):
+    """Risk labels -> LABEL_TO_ID ids (stripped, case-insensitive; unknown labels -> 0). Returns int32 array."""
+    import numpy as np
+
+    return risk.astype(str).str.strip().str.lower().map(LABEL_TO_ID).fillna(0).to_numpy(dtype=np.int32)
+
+
+def numeric_features(texts):
+    """(N, len(NUMERIC_FEATURES)) float32 array of the vitals in each text; missing fields are 0."""
+    import numpy as np
+    import pandas as pd
+
+    texts = pd.Series(texts, dtype=str)
+    cols = []
+    for name, rx in NUMERIC_FIELD_RES.items():
+        if name == "sleep_h":
+            hm = texts.str.extract(rx).astype("float64").fillna(0)
+            cols.append(hm[0] + hm[1] / 60)
+        else:
+            cols.append(texts.str.extract(rx, expand=False).astype("float64").fillna(0))
+    return np.column_stack(cols).astype(np.float32)
+
+
+def _cached_encode(tokenizer):
+    """
+    Tokenize DATASET_CSV (padding/truncation to MAX_LEN) and return int32 arrays
+    (input_ids, attention_mask, token_type_ids, labels). The arrays are saved under
+    ENCODE_CACHE_DIR keyed by dataset path/mtime/size, MAX_LEN and tokenizer; later
+    exports memory-map them instead of re-reading and re-tokenizing the dataset.
+    Writing a new key removes the previous entries.
+    """
+    import hashlib
+
+    import numpy as np
+    import pandas as pd
+
+    st = DATASET_CSV.stat()
+    key = f"{DATASET_CSV.resolve()}|{st.st_mtime_ns}|{st.st_size}|{MAX_LEN}|{tokenizer.name_or_path}|{len(tokenizer)}"
+    cache = ENCODE_CACHE_DIR / hashlib.sha1(key.encode()).hexdigest()[:16]
+    names = ("input_ids", "attention_mask", "token_type_ids", "labels")
+    if all((cache / f"{n}.npy").exists() for n in names):
+        print("Using cached encodings from", cache)
+        return tuple(np.load(cache / f"{n}.npy", mmap_mode="r") for n in names)
+
+    df = _read_dataset()
+    texts = df["text"].astype(str).tolist()  # plain list: fast tokenizer batches it in Rust
+    labels = _label_ids(df["risk_level"])
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+    enc = tokenizer(
+        texts,
+        padding="max_length",
+        truncation=True,
+        max_length=MAX_LEN,
+        return_tensors="np",
+    )
+    input_ids = np.array(enc["input_ids"], dtype=np.int32)
+    arrays = (
+        input_ids,
+        np.array(enc["attention_mask"], dtype=np.int32),
+        np.array(enc.get("token_type_ids", np.zeros_like(input_ids)), dtype=np.int32),
+        labels,
+    )
+    # One entry at a time: encodings for an older dataset/tokenizer are never read again
+    if ENCODE_CACHE_DIR.is_dir():
+        for stale in ENCODE_CACHE_DIR.iterdir():
+            if stale != cache:
+                shutil.rmtree(stale, ignore_errors=True)
+    cache.mkdir(parents=True, exist_ok=True)
+    for n, a in zip(names, arrays):
+        np.save(cache / f"{n}.npy", a)
+    return arrays
+
+
+def _write_int8_tflite(model, rep_inputs, out_path: Path) -> bool:
+    """
+    Full-integer post-training quantization of a Keras model (int8 weights and activations).
+    rep_inputs: input arrays in model input order; REP_SAMPLES rows drawn across the whole
+    dataset (fixed seed) calibrate ranges. Token-id inputs stay int32 and the output stays
+    float32. Returns True if written.
+    """
+    import numpy as np
+    import tensorflow as tf
+
+    total = len(rep_inputs[0])
+    rows = np.sort(np.random.default_rng(0).choice(total, min(REP_SAMPLES, total), replace=False))
+
+    def representative_dataset():
+        for i in rows:
+            yield [np.asarray(a[i : i + 1]) for a in rep_inputs]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_output_type = tf.float32
+    try:
+        out_path.write_bytes(converter.convert())
+    except Exception as e:  # converter raises for ops without an int8 kernel
+        print("int8 TFLite conversion failed:", e, file=sys.stderr)
+        return False
+    print("Wrote", out_path)
+    return True
+
+
+def _write_fp16_tflite(model, out_path: Path) -> bool:
+    """Float16-weight TFLite of a Keras model (half size; runs on the Android GPU delegate). Returns True if written."""
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_types = [tf.float16]
+    try:
+        out_path.write_bytes(converter.convert())
+    except Exception as e:
+        print("fp16 TFLite conversion failed:", e, file=sys.stderr)
+        return False
+    print("Wrote", out_path)
+    return True
+
+
+def _teacher_logits(input_ids, attention_mask, token_type_ids, batch_size: int = 64):
+    """(N, NUM_LABELS) float32 logits of the fine-tuned MobileBERT on the cached encodings, or None without torch."""
+    try:
+        import numpy as np
+        import torch
+        from transformers import MobileBertForSequenceClassification
+    except ImportError as e:
+        print("Distillation needs: pip install torch transformers", e)
+        return None
+
+    model = MobileBertForSequenceClassification.from_pretrained(str(SAVED_MODEL))
+    model.eval()
+    out = []
+    with torch.inference_mode():
+        for i in range(0, len(input_ids), batch_size):
+            batch = {
+                name: torch.from_numpy(np.asarray(a[i : i + batch_size], dtype=np.int64))
+                for name, a in (("input_ids", input_ids), ("attention_mask", attention_mask), ("token_type_ids", token_type_ids))
+            }
+            out.append(model(**batch).logits.float().numpy())
+    return np.concatenate(out).astype(np.float32)
+
+
+def _distill_loss(y_true, logits):
+    """
+    y_true packs [hard label, teacher logits...] per row. Loss is
+    DISTILL_ALPHA * T^2 * KL(teacher_T || student_T) + (1 - DISTILL_ALPHA) * CE(label).
+    """
+    import tensorflow as tf
+
+    labels = tf.cast(y_true[:, 0], tf.int32)
+    soft = tf.nn.softmax(y_true[:, 1:] / DISTILL_T)
+    kl = tf.keras.losses.kl_divergence(soft, tf.nn.softmax(logits / DISTILL_T)) * DISTILL_T**2
+    ce = tf.keras.losses.sparse_categorical_crossentropy(labels, logits, from_logits=True)
+    return DISTILL_ALPHA * kl + (1 - DISTILL_ALPHA) * ce
+
+
+def _hard_label_accuracy(y_true, logits):
+    """Accuracy against the hard label in column 0 of a packed distillation target."""
+    import tensorflow as tf
+
+    return tf.keras.metrics.sparse_categorical_accuracy(tf.cast(y_true[:, 0], tf.int32), logits)
+
+
+def _prune_vocab(tokenizer, input_ids):
+    """
+    Keep only the token ids seen in the dataset (plus special tokens) as embedding rows.
+    Returns (remapped input_ids, old_ids, unk_id) where old_ids[new_id] is the tokenizer id;
+    ids outside the kept set map to the [UNK] row (unk_id) at inference.
+    """
+    import numpy as np
+
+    old_ids = np.union1d(np.unique(input_ids), tokenizer.all_special_ids).astype(np.int32)
+    unk = int(np.searchsorted(old_ids, tokenizer.unk_token_id))
+    remap = np.full(max(len(tokenizer), int(old_ids[-1]) + 1), unk, dtype=np.int32)
+    remap[old_ids] = np.arange(len(old_ids), dtype=np.int32)
+    return remap[input_ids], old_ids, unk
+
+
+def _quantize_aware(model):
+    """
+    Wrap model's Dense layers for quantization-aware training (fake-quant weights/activations).
+    Embedding and pooling have no QAT scheme and keep float training; the int8 converter still
+    calibrates them. Returns the wrapped model, or None if tfmot is unavailable or fails.
+    """
+    import tensorflow as tf
+
+    try:
+        import tensorflow_model_optimization as tfmot
+    except ImportError as e:
+        print("QAT needs: pip install tensorflow-model-optimization", e)
+        return None
+
+    annotate = tfmot.quantization.keras.quantize_annotate_layer
+
+    def _annotate(layer):
+        return annotate(layer) if isinstance(layer, tf.keras.layers.Dense) else layer
+
+    try:
+        annotated = tf.keras.models.clone_model(model, clone_function=_annotate)
+        return tfmot.quantization.keras.quantize_apply(annotated)
+    except Exception as e:  # e.g. Keras 3 without tf_keras
+        print("QAT wrapping failed, training without it:", e, file=sys.stderr)
+        return None
+
+
+def _fit_datasets(inputs, labels):
+    """
+    (train_ds, val_ds) for model.fit. The last VAL_SPLIT of rows is held out, as
+    validation_split did; small sets (<100 rows) repeat the training split 3x via
+    tf.data instead of copying the arrays. inputs: arrays in model input order.
+    """
+    import tensorflow as tf
+
+    n_train = int(len(labels) * (1 - VAL_SPLIT))
+
+    def _slice(sl):
+        xs = tuple(a[sl] for a in inputs)
+        return tf.data.Dataset.from_tensor_slices((xs if len(xs) > 1 else xs[0], labels[sl]))
+
+    train_ds = _slice(slice(None, n_train)).shuffle(512)
+    if len(labels) < 100:
+        train_ds = train_ds.repeat(3)
+    train_ds = train_ds.batch(BATCH_SIZE).prefetch(tf.data.AUTOTUNE)
+    val_ds = _slice(slice(n_train, None)).batch(BATCH_SIZE) if n_train < len(labels) else None
+    return train_ds, val_ds
+
+
+def export_keras_to_tflite(distill: bool = True, prune_vocab: bool = True, qat: bool = False) -> bool:
     """
     Train a small Keras model (embedding + pooling + dense) on the same dataset,
     then export to TFLite. Copies tokenizer to TFLITE_DIR for mobile use.
+    With distill, the model also learns the fine-tuned MobileBERT's soft labels.
+    With prune_vocab, the embedding only has rows for tokens seen in the dataset and
+    vocab_map.json maps tokenizer ids to them.
+    With qat, the Dense layers train with fake int8 quantization before the int8 export.
     """
     try:
         import numpy as np
-        import pandas as pd
         import tensorflow as tf
         from transformers import AutoTokenizer
     except ImportError as e:
@@ -115,26 +416,27 @@ def export_keras_to_tflite() -> bool:
         return False
 
     print("Loading tokenizer and dataset...")
-    tokenizer = AutoTokenizer.from_pretrained(str(SAVED_MODEL))
-    df = pd.read_csv(DATASET_CSV)
-    texts = df["text"].astype(str).tolist()
-    labels = [risk_to_id(r) for r in df["risk_level"]]
-
-    enc = tokenizer(
-        texts,
-        padding="max_length",
-        truncation=True,
-        max_length=MAX_LEN,
-        return_tensors="np",
-    )
-    input_ids = np.array(enc["input_ids"], dtype=np.int32)
-    labels_np = np.array(labels, dtype=np.int32)
-    # Repeat to get more steps
-    if len(texts) < 100:
-        input_ids = np.tile(input_ids, (3, 1))
-        labels_np = np.tile(labels_np, 3)
+    tokenizer = AutoTokenizer.from_pretrained(str(SAVED_MODEL), use_fast=True)
+    input_ids, attention_mask, token_type_ids, labels_np = _cached_encode(tokenizer)
+    teacher = None
+    if distill:
+        print("Computing MobileBERT teacher logits...")
+        teacher = _teacher_logits(input_ids, attention_mask, token_type_ids)
+    if teacher is not None:
+        # Pack hard label + teacher logits into one target so tf.data/Keras carry both
+        targets = np.concatenate([labels_np[:, None].astype(np.float32), teacher], axis=1)
+        loss, metrics = _distill_loss, [_hard_label_accuracy]
+    else:
+        targets = labels_np
+        loss, metrics = tf.keras.losses.SparseCategoricalCrossentropy(from_logits=True), ["accuracy"]
 
     vocab_size = getattr(tokenizer, "vocab_size", 30522) or 30522
+    old_ids = None
+    if prune_vocab:
+        input_ids, old_ids, unk_id = _prune_vocab(tokenizer, input_ids)
+        print(f"Pruned embedding vocab {vocab_size} -> {len(old_ids)} tokens")
+        vocab_size = len(old_ids)
+    train_ds, val_ds = _fit_datasets([input_ids], targets)
 
     print("Building Keras model (embedding + pool + dense)...")
     inp = tf.keras.layers.Input(shape=(MAX_LEN,), dtype=tf.int32, name="input_ids")
@@ -144,14 +446,17 @@ def export_keras_to_tflite() -> bool:
     x = tf.keras.layers.Dropout(0.2)(x)
     logits = tf.keras.layers.Dense(NUM_LABELS, name="logits")(x)
     model = tf.keras.Model(inputs=inp, outputs=logits)
+    if qat:
+        model = _quantize_aware(model) or model
     model.compile(
         optimizer="adam",
-        loss=tf.keras.losses.SparseCategoricalCrossentropy(from_logits=True),
-        metrics=["accuracy"],
+        loss=loss,
+        metrics=metrics,
+        jit_compile=KERAS_JIT_COMPILE,
     )
 
     print("Training Keras model...")
-    model.fit(input_ids, labels_np, epochs=8, batch_size=8, validation_split=0.15, verbose=1)
+    model.fit(train_ds, epochs=8, validation_data=val_ds, verbose=1)
 
     TFLITE_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -162,16 +467,26 @@ def export_keras_to_tflite() -> bool:
     tflite_path = TFLITE_DIR / "health_risk_classifier.tflite"
     tflite_path.write_bytes(tflite_model)
     print("Wrote", tflite_path)
+    _write_int8_tflite(model, [input_ids], TFLITE_DIR / "health_risk_classifier_int8.tflite")
+    _write_fp16_tflite(model, TFLITE_DIR / "health_risk_classifier_fp16.tflite")
 
     # Copy tokenizer so mobile can preprocess the same way
     tokenizer.save_pretrained(str(TFLITE_DIR))
     print("Copied tokenizer to", TFLITE_DIR)
+    if old_ids is not None:
+        VOCAB_MAP_JSON.write_text(json.dumps({"old_ids": old_ids.tolist(), "unk_id": unk_id}))
+        print("Wrote", VOCAB_MAP_JSON)
+    else:
+        VOCAB_MAP_JSON.unlink(missing_ok=True)
 
     # Write metadata for mobile
     (TFLITE_DIR / "labels.txt").write_text("\n".join(RISK_LABELS))
     (TFLITE_DIR / "README.txt").write_text(
         "health_risk_classifier.tflite: input shape (1, 64) int32 (input_ids), output shape (1, 3) float32 (logits).\n"
+        "health_risk_classifier_int8.tflite: same inputs/outputs, int8 weights and activations (CPU / NNAPI / Hexagon).\n"
+        "health_risk_classifier_fp16.tflite: same inputs/outputs, float16 weights (use with GpuDelegate on Android).\n"
         "Use tokenizer in this folder to convert text to input_ids (max_length=64, padding=max_length, truncation=True).\n"
+        "If vocab_map.json is present, replace each tokenizer id t with old_ids.index(t) (unk_id if absent) before feeding.\n"
         "labels.txt: green, yellow, red (index 0, 1, 2)."
     )
     return True
@@ -184,7 +499,6 @@ def export_keras_for_mediapipe() -> bool:
     """
     try:
         import numpy as np
-        import pandas as pd
         import tensorflow as tf
         from transformers import AutoTokenizer
     except ImportError as e:
@@ -199,27 +513,9 @@ def export_keras_for_mediapipe() -> bool:
         return False
 
     print("Loading tokenizer and dataset...")
-    tokenizer = AutoTokenizer.from_pretrained(str(SAVED_MODEL))
-    df = pd.read_csv(DATASET_CSV)
-    texts = df["text"].astype(str).tolist()
-    labels = [risk_to_id(r) for r in df["risk_level"]]
-
-    enc = tokenizer(
-        texts,
-        padding="max_length",
-        truncation=True,
-        max_length=MAX_LEN,
-        return_tensors="np",
-    )
-    input_ids = np.array(enc["input_ids"], dtype=np.int32)
-    attention_mask = np.array(enc["attention_mask"], dtype=np.int32)
-    token_type_ids = np.array(enc.get("token_type_ids", np.zeros_like(input_ids)), dtype=np.int32)
-    labels_np = np.array(labels, dtype=np.int32)
-    if len(texts) < 100:
-        input_ids = np.tile(input_ids, (3, 1))
-        attention_mask = np.tile(attention_mask, (3, 1))
-        token_type_ids = np.tile(token_type_ids, (3, 1))
-        labels_np = np.tile(labels_np, 3)
+    tokenizer = AutoTokenizer.from_pretrained(str(SAVED_MODEL), use_fast=True)
+    input_ids, attention_mask, token_type_ids, labels_np = _cached_encode(tokenizer)
+    train_ds, val_ds = _fit_datasets([input_ids, attention_mask, token_type_ids], labels_np)
 
     vocab_size = getattr(tokenizer, "vocab_size", 30522) or 30522
 
@@ -236,11 +532,12 @@ def export_keras_for_mediapipe() -> bool:
     logits = tf.keras.layers.Dense(NUM_LABELS)(x)
     # MediaPipe expects "probability" output in [0,1]; output softmax so scores are proper probabilities.
     probs = tf.keras.layers.Softmax(name=OUTPUT_LOGITS_NAME)(logits)
-    # Tie mask/segment into graph so Keras accepts them (zero contribution)
+    # Tie mask/segment into graph so Keras and the converter keep them as inputs (zero contribution).
+    # Only the first column of each is touched: no full reductions or ones_like broadcast per inference.
     def _zero_from_inputs(inputs):
         p, mask_t, seg_t = inputs[0], inputs[1], inputs[2]
-        z = 0.0 * (tf.reduce_sum(tf.cast(mask_t, tf.float32)) + tf.reduce_sum(tf.cast(seg_t, tf.float32)))
-        return p + z * tf.ones_like(p)
+        z = 0.0 * tf.cast(mask_t[:, :1] + seg_t[:, :1], tf.float32)
+        return p + z
     probs = tf.keras.layers.Lambda(
         _zero_from_inputs, name="logits_out", output_shape=(None, NUM_LABELS)
     )([probs, mask_inp, seg_inp])
@@ -249,6 +546,7 @@ def export_keras_for_mediapipe() -> bool:
         optimizer="adam",
         loss=tf.keras.losses.SparseCategoricalCrossentropy(from_logits=False),
         metrics=["accuracy"],
+        jit_compile=KERAS_JIT_COMPILE,
     )
 
     # Class weights so model doesn't collapse to green (index 0)
@@ -259,11 +557,9 @@ def export_keras_for_mediapipe() -> bool:
 
     print("Training Keras model (with class weights)...")
     model.fit(
-        [input_ids, attention_mask, token_type_ids],
-        labels_np,
+        train_ds,
         epochs=12,
-        batch_size=8,
-        validation_split=0.15,
+        validation_data=val_ds,
         class_weight=class_weight,
         verbose=1,
     )
@@ -276,6 +572,13 @@ def export_keras_for_mediapipe() -> bool:
     base_tflite = TFLITE_DIR / "health_risk_classifier_3input.tflite"
     base_tflite.write_bytes(tflite_model)
     print("Wrote", base_tflite)
+    _write_int8_tflite(
+        model, [input_ids, attention_mask, token_type_ids], TFLITE_DIR / "health_risk_classifier_3input_int8.tflite"
+    )
+    emb_layer = next(l for l in model.layers if isinstance(l, tf.keras.layers.Embedding))
+    (w1, b1), (w2, b2) = [l.get_weights() for l in model.layers if isinstance(l, tf.keras.layers.Dense)]
+    np.savez(PROBE_WEIGHTS, emb=emb_layer.get_weights()[0], w1=w1, b1=b1, w2=w2, b2=b2)
+    print("Wrote", PROBE_WEIGHTS)
 
     # Vocab in BERT format (one token per line) for metadata tokenizer
     vocab_path = TFLITE_DIR / "vocab.txt"
@@ -299,12 +602,67 @@ def export_keras_for_mediapipe() -> bool:
     tokenizer.save_pretrained(str(TFLITE_DIR))
     (TFLITE_DIR / "README_mediapipe.txt").write_text(
         "model.tflite: 3 inputs (ids, mask, segment_ids) shape (1, 64) int32; output (logits) (1, 3) float32.\n"
+        "health_risk_classifier_3input_int8.tflite: same inputs/outputs, int8 weights and activations (no metadata).\n"
+        "probe_weights.npz: embedding + dense weights for the numpy reference in run_mediapipe_tflite_test.py --numpy_probe.\n"
         "For Android: put model.tflite in app/src/main/assets/ (as model.tflite).\n"
         "Labels: green, yellow, red. If metadata was attached, MediaPipe TextClassifier uses it as-is."
     )
     return True
 
 
+def export_numeric_to_tflite() -> bool:
+    """
+    Train a small MLP on the vitals parsed from each text (NUMERIC_FEATURES) instead of
+    tokens, and export float32 + full-int8 TFLite. The app parses the same fields with the
+    patterns in numeric_features.json and feeds a (1, len(NUMERIC_FEATURES)) float32 vector.
+    """
+    try:
+        import numpy as np
+        import tensorflow as tf
+    except ImportError as e:
+        print("Numeric-feature export needs: pip install tensorflow pandas", e)
+        return False
+
+    if not DATASET_CSV.exists():
+        print("No dataset at", DATASET_CSV, "- run data/build_health_risk_dataset.py first.")
+        return False
+
+    df = _read_dataset()
+    features = numeric_features(df["text"])
+    labels_np = _label_ids(df["risk_level"])
+    train_ds, val_ds = _fit_datasets([features], labels_np)
+
+    print(f"Building Keras MLP on {len(NUMERIC_FEATURES)} numeric features...")
+    norm = tf.keras.layers.Normalization()
+    norm.adapt(features)
+    inp = tf.keras.layers.Input(shape=(len(NUMERIC_FEATURES),), dtype=tf.float32, name="vitals")
+    x = norm(inp)
+    x = tf.keras.layers.Dense(32, activation="relu")(x)
+    x = tf.keras.layers.Dense(16, activation="relu")(x)
+    logits = tf.keras.layers.Dense(NUM_LABELS, name="logits")(x)
+    model = tf.keras.Model(inputs=inp, outputs=logits)
+    model.compile(
+        optimizer="adam",
+        loss=tf.keras.losses.SparseCategoricalCrossentropy(from_logits=True),
+        metrics=["accuracy"],
+        jit_compile=KERAS_JIT_COMPILE,
+    )
+
+    print("Training Keras MLP...")
+    model.fit(train_ds, epochs=30, validation_data=val_ds, verbose=1)
+
+    TFLITE_DIR.mkdir(parents=True, exist_ok=True)
+    tflite_path = TFLITE_DIR / "health_risk_numeric.tflite"
+    tflite_path.write_bytes(tf.lite.TFLiteConverter.from_keras_model(model).convert())
+    print("Wrote", tflite_path)
+    _write_int8_tflite(model, [features], TFLITE_DIR / "health_risk_numeric_int8.tflite")
+
+    spec = {"features": NUMERIC_FEATURES, "patterns": {k: rx.pattern for k, rx in NUMERIC_FIELD_RES.items()}}
+    (TFLITE_DIR / "numeric_features.json").write_text(json.dumps(spec, indent=2))
+    (TFLITE_DIR / "labels.txt").write_text("\n".join(RISK_LABELS))
+    return True
+
+
 def _get_tflite_input_names(model_buffer: bytearray) -> tuple:
     """Return (ids_name, mask_name, segment_name) from the TFLite model (order may vary)."""
     try:
@@ -374,6 +732,26 @@ def _copy_to_android_assets(model_path: Path) -> None:
 def main():
     parser = argparse.ArgumentParser(description="Export health risk model to TFLite")
     parser.add_argument("--use_keras_only", action="store_true", help="Skip Optimum, use Keras fallback only")
+    parser.add_argument(
+        "--no_distill",
+        action="store_true",
+        help="Train the Keras fallback on hard labels only (skip MobileBERT soft-label distillation)",
+    )
+    parser.add_argument(
+        "--full_vocab",
+        action="store_true",
+        help="Keep the full tokenizer vocab in the Keras fallback's embedding (no vocab_map.json)",
+    )
+    parser.add_argument(
+        "--qat",
+        action="store_true",
+        help="Quantization-aware training of the Keras fallback's Dense layers (needs tensorflow-model-optimization)",
+    )
+    parser.add_argument(
+        "--numeric_features",
+        action="store_true",
+        help="Train an MLP on parsed vitals (HR, SpO2, steps, active, sleep) -> health_risk_numeric.tflite",
+    )
     parser.add_argument(
         "--for_mediapipe",
         action="store_true",
@@ -383,13 +761,21 @@ def main():
 
     TFLITE_DIR.mkdir(parents=True, exist_ok=True)
 
-    if args.for_mediapipe:
+    if args.numeric_features:
+        ok = export_numeric_to_tflite()
+        if ok:
+            print("\nDone. TFLite output:", TFLITE_DIR)
+            print("  - health_risk_numeric.tflite / health_risk_numeric_int8.tflite")
+            print("  - numeric_features.json (feature order + parsing patterns) + labels.txt")
+    elif args.for_mediapipe:
         ok = export_keras_for_mediapipe()
         if ok:
             print("\nDone. For Android: use ml/tflite/model.tflite as model.tflite in app assets.")
             print("  Copy to android/.../app/src/main/assets/model.tflite (or run export; it may auto-copy).")
     elif args.use_keras_only:
-        ok = export_keras_to_tflite()
+        ok = export_keras_to_tflite(
+            distill=not args.no_distill, prune_vocab=not args.full_vocab, qat=args.qat
+        )
         if ok:
             print("\nDone. TFLite output:", TFLITE_DIR)
             print("  - health_risk_classifier.tflite")
@@ -398,7 +784,9 @@ def main():
         ok = try_optimum_export()
         if not ok:
             print("Falling back to Keras model + TFLite export...")
-            ok = export_keras_to_tflite()
+            ok = export_keras_to_tflite(
+                distill=not args.no_distill, prune_vocab=not args.full_vocab, qat=args.qat
+            )
         if ok:
             print("\nDone. TFLite output:", TFLITE_DIR)
             print("  - health_risk_classifier.tflite (or from Optimum)")
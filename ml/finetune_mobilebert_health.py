@@ -11,6 +11,7 @@ import argparse
 import sys
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
@@ -19,6 +20,7 @@ DEFAULT_DATASET = DATA_DIR / "health_risk_dataset.csv"
 DEFAULT_OUTPUT = REPO_ROOT / "ml" / "saved_model"
 RISK_LABELS = ["green", "yellow", "red"]
 NUM_LABELS = len(RISK_LABELS)
+LABEL_TO_ID = {name: i for i, name in enumerate(RISK_LABELS)}
 RECOMMENDATIONS = {
     "green": "Continue normal activity. Stay hydrated.",
     "yellow": "Monitor vital signs. Consider rest and hydration soon.",
@@ -31,27 +33,44 @@ def load_dataset(csv_path: Path) -> pd.DataFrame:
         raise FileNotFoundError(
             f"Dataset not found: {csv_path}. Run: python data/build_health_risk_dataset.py"
         )
-    df = pd.read_csv(csv_path)
+    df = pd.read_parquet(csv_path) if csv_path.suffix == ".parquet" else pd.read_csv(csv_path)
     if "text" not in df.columns or "risk_level" not in df.columns:
         raise ValueError("Dataset must have columns 'text' and 'risk_level'.")
     return df
 
 
 def risk_to_id(risk: str) -> int:
-    r = str(risk).strip().lower()
-    if r not in RISK_LABELS:
-        return 0
-    return RISK_LABELS.index(r)
+    return LABEL_TO_ID.get(str(risk).strip().lower(), 0)
+
+
+def risk_ids(risk: pd.Series) -> np.ndarray:
+    """Vectorized risk_to_id: int8 codes in RISK_LABELS order, unknown labels -> 0."""
+    codes = pd.Categorical(risk.astype(str).str.strip().str.lower(), categories=RISK_LABELS).codes
+    return np.where(codes < 0, 0, codes).astype(np.int8)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Fine-tune MobileBERT for health risk classification")
-    parser.add_argument("--dataset", type=Path, default=DEFAULT_DATASET, help="Path to health_risk_dataset.csv")
+    parser.add_argument("--dataset", type=Path, default=DEFAULT_DATASET, help="Path to health_risk_dataset.csv (or .parquet)")
     parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Output model directory")
     parser.add_argument("--epochs", type=int, default=3, help="Training epochs")
     parser.add_argument("--batch_size", type=int, default=4, help="Batch size")
     parser.add_argument("--max_length", type=int, default=64, help="Max token length")
     parser.add_argument("--lr", type=float, default=1e-5, help="Learning rate (use 1e-5 if loss is very high at start)")
+    parser.add_argument("--no_amp", action="store_true", help="Disable mixed precision on CUDA (train in fp32)")
+    parser.add_argument(
+        "--freeze_layers",
+        type=int,
+        default=0,
+        help="Freeze embeddings and the lowest N of MobileBERT's 24 encoder layers (less backward compute)",
+    )
+    parser.add_argument(
+        "--grad_accum",
+        type=int,
+        default=1,
+        help="Accumulate gradients over N batches per optimizer step (effective batch = batch_size * N)",
+    )
+    parser.add_argument("--compile", action="store_true", help="torch.compile the model for training on CUDA (pays off on longer runs)")
     args = parser.parse_args()
 
     try:
@@ -65,13 +84,14 @@ def main():
         return 1
 
     df = load_dataset(args.dataset)
-    df["label"] = df["risk_level"].apply(risk_to_id)
+    df["label"] = risk_ids(df["risk_level"])
     texts = df["text"].astype(str).tolist()
-    labels = df["label"].tolist()
+    # int8 until the tensor boundary, where the loss needs int64
+    labels = df["label"].to_numpy()
 
     if len(texts) < 30:
         texts = texts * 4
-        labels = labels * 4
+        labels = np.tile(labels, 4)
 
     print(f"Training on {len(texts)} examples, {NUM_LABELS} classes: {RISK_LABELS}")
 
@@ -82,32 +102,79 @@ def main():
     )
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     model = model.to(device)
-    optimizer = torch.optim.AdamW(model.parameters(), lr=args.lr)
+    if args.freeze_layers > 0:
+        for p in model.mobilebert.embeddings.parameters():
+            p.requires_grad_(False)
+        for layer in model.mobilebert.encoder.layer[: args.freeze_layers]:
+            for p in layer.parameters():
+                p.requires_grad_(False)
+        print(f"Froze embeddings and {min(args.freeze_layers, len(model.mobilebert.encoder.layer))} encoder layers")
+    # The compiled wrapper shares parameters with model; saving and the example below use the plain module
+    train_model = model
+    if args.compile and device.type == "cuda" and hasattr(torch, "compile"):
+        train_model = torch.compile(model, mode="max-autotune")
+    trainable = [p for p in model.parameters() if p.requires_grad]
+    optimizer = torch.optim.AdamW(trainable, lr=args.lr, fused=device.type == "cuda")
+    # Mixed precision on CUDA: bf16 where supported, else fp16 with loss scaling
+    use_amp = device.type == "cuda" and not args.no_amp
+    amp_dtype = torch.bfloat16 if use_amp and torch.cuda.is_bf16_supported() else torch.float16
+    use_scaler = use_amp and amp_dtype == torch.float16
+    if hasattr(torch.amp, "GradScaler"):  # torch >= 2.3; older releases only have the cuda alias
+        scaler = torch.amp.GradScaler("cuda", enabled=use_scaler)
+    else:
+        scaler = torch.cuda.amp.GradScaler(enabled=use_scaler)
+
+    # Tokenize each distinct text once (the small-dataset repeat and identical days are duplicates),
+    # then expand to the full training order; each batch below is a slice of these tensors
+    unique_texts, inverse = np.unique(np.asarray(texts, dtype=object), return_inverse=True)
+    enc = tokenizer(
+        unique_texts.tolist(),
+        padding="longest",
+        truncation=True,
+        max_length=args.max_length,
+        return_tensors="pt",
+    )
+    inverse = torch.as_tensor(inverse.reshape(-1))
+    enc = {k: v[inverse] for k, v in enc.items()}
+    # Per-example token counts (on CPU) so each batch can drop columns that are padding for all its rows
+    lengths = enc["attention_mask"].sum(dim=1)
+    padded_len = enc["input_ids"].shape[1]
+    pin = device.type == "cuda"
+    enc = {k: (v.pin_memory() if pin else v).to(device, non_blocking=pin) for k, v in enc.items()}
+    labels_t = torch.as_tensor(labels, dtype=torch.long).to(device, non_blocking=pin)
 
     # Training loop
     model.train()
+    grad_accum = max(1, args.grad_accum)
+    optimizer.zero_grad(set_to_none=True)
+    n_batches = max(1, (len(texts) + args.batch_size - 1) // args.batch_size)
     for epoch in range(args.epochs):
         total_loss = 0.0
-        for i in range(0, len(texts), args.batch_size):
-            batch_texts = texts[i : i + args.batch_size]
-            batch_labels = labels[i : i + args.batch_size]
-            enc = tokenizer(
-                batch_texts,
-                padding="max_length",
-                truncation=True,
-                max_length=args.max_length,
-                return_tensors="pt",
-            )
-            enc = {k: v.to(device) for k, v in enc.items()}
-            labels_t = torch.tensor(batch_labels, dtype=torch.long, device=device)
-            optimizer.zero_grad()
-            out = model(**enc, labels=labels_t)
+        # Fresh shuffle each epoch: batches gather rows of the cached tensors by permuted index
+        perm = torch.randperm(len(texts))
+        for step, i in enumerate(range(0, len(texts), args.batch_size)):
+            idx = perm[i : i + args.batch_size]
+            # Dynamic padding: longest sequence in the batch, rounded up to a multiple of 8
+            seq_len = min(padded_len, -(-int(lengths[idx].max()) // 8) * 8)
+            if train_model is not model:
+                # Compiled: snap to power-of-two buckets so only a few shapes are compiled and autotuned
+                seq_len = min(padded_len, max(16, 1 << (seq_len - 1).bit_length()))
+            idx = idx.to(device, non_blocking=pin)
+            batch = {k: v[idx, :seq_len] for k, v in enc.items()}
+            with torch.autocast(device_type=device.type, dtype=amp_dtype, enabled=use_amp):
+                out = train_model(**batch, labels=labels_t[idx])
             loss = out.loss
-            loss.backward()
-            torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
-            optimizer.step()
+            # Average over the batches actually in this step's group (the epoch's last one may be short)
+            group_start = step - step % grad_accum
+            scaler.scale(loss / min(grad_accum, n_batches - group_start)).backward()
+            # Step every grad_accum batches and on the epoch's last batch
+            if (step + 1) % grad_accum == 0 or step + 1 == n_batches:
+                scaler.unscale_(optimizer)
+                torch.nn.utils.clip_grad_norm_(trainable, max_norm=1.0)
+                scaler.step(optimizer)
+                scaler.update()
+                optimizer.zero_grad(set_to_none=True)
             total_loss += loss.item()
-        n_batches = max(1, (len(texts) + args.batch_size - 1) // args.batch_size)
         print(f"Epoch {epoch + 1}/{args.epochs} loss: {total_loss / n_batches:.4f}")
 
     args.output.mkdir(parents=True, exist_ok=True)
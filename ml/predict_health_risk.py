@@ -1,16 +1,21 @@
 #!/usr/bin/env python3
 """
 Run health risk + recommendation from saved MobileBERT model (PyTorch).
+Uses the int8 ONNX export (ml/onnx/model.int8.onnx, from ml/export_to_onnx.py) through
+onnxruntime instead when it is installed and the export is up to date.
 
 Usage:
   python ml/predict_health_risk.py "HR average 88 bpm HR max 105 steps 3000 active 25 minutes"
   python ml/predict_health_risk.py   # reads from stdin, one sentence per line
 """
+import itertools
 import sys
 from pathlib import Path
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
 MODEL_DIR = REPO_ROOT / "ml" / "saved_model"
+ONNX_MODEL = REPO_ROOT / "ml" / "onnx" / "model.int8.onnx"  # from ml/export_to_onnx.py
+STDIN_BATCH = 32  # stdin lines classified per tokenizer call / forward pass
 RISK_LABELS = ["green", "yellow", "red"]
 RECOMMENDATIONS = {
     "green": "Continue normal activity. Stay hydrated.",
@@ -19,24 +24,79 @@ RECOMMENDATIONS = {
 }
 
 
-def load_model_and_tokenizer(model_dir: Path):
-    from transformers import AutoTokenizer, MobileBertForSequenceClassification
-    import torch
-    tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+def load_model_and_tokenizer(model_dir: Path, onnx_path: Path = ONNX_MODEL):
+    """Returns (model, tokenizer). model is an onnxruntime InferenceSession when onnxruntime is
+    installed and onnx_path is at least as new as model_dir, else the PyTorch MobileBERT."""
+    from transformers import AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(str(model_dir), use_fast=True)
+    session = _load_onnx_session(model_dir, onnx_path)
+    if session is not None:
+        return session, tokenizer
+    from transformers import MobileBertForSequenceClassification
     model = MobileBertForSequenceClassification.from_pretrained(str(model_dir))
     model.eval()
     return model, tokenizer
 
 
-def predict(text: str, model, tokenizer, max_length: int = 64):
+def _load_onnx_session(model_dir: Path, onnx_path: Path):
+    """CPU ONNX Runtime session with full graph optimizations, or None if unavailable or stale."""
+    if not onnx_path.exists():
+        return None
+    newest = max((f.stat().st_mtime for f in model_dir.iterdir() if f.is_file()), default=0)
+    if onnx_path.stat().st_mtime < newest:
+        print(f"Ignoring {onnx_path} (older than {model_dir}); re-run ml/export_to_onnx.py", file=sys.stderr)
+        return None
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        return None
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(str(onnx_path), opts, providers=["CPUExecutionProvider"])
+
+
+def _predict_ids_onnx(texts, session, tokenizer, max_length: int, batch_size: int):
+    import numpy as np
+    enc = tokenizer(texts, return_tensors="np", padding="longest", truncation=True, max_length=max_length)
+    names = [i.name for i in session.get_inputs()]
+    feeds = {n: np.asarray(enc[n] if n in enc else np.zeros_like(enc["input_ids"]), dtype=np.int64) for n in names}
+    lengths = enc["attention_mask"].sum(axis=1)
+    pred_ids = []
+    for i in range(0, len(texts), batch_size):
+        seq_len = int(lengths[i : i + batch_size].max())
+        (logits,) = session.run(None, {n: v[i : i + batch_size, :seq_len] for n, v in feeds.items()})
+        pred_ids.extend(logits.argmax(axis=-1).tolist())
+    return pred_ids
+
+
+def predict_batch(texts, model, tokenizer, max_length: int = 64, batch_size: int = 64, device=None):
+    """Classify many texts with one tokenizer call and batched forward passes.
+    Returns a list of (risk, recommendation) in input order."""
+    texts = list(texts)
+    if not texts:
+        return []
+    if hasattr(model, "get_inputs"):  # onnxruntime.InferenceSession
+        pred_ids = _predict_ids_onnx(texts, model, tokenizer, max_length, batch_size)
+        return [(RISK_LABELS[i], RECOMMENDATIONS[RISK_LABELS[i]]) for i in pred_ids]
     import torch
-    device = next(model.parameters()).device
-    enc = tokenizer(text, return_tensors="pt", padding="max_length", truncation=True, max_length=max_length)
-    enc = {k: v.to(device) for k, v in enc.items()}
-    with torch.no_grad():
-        logits = model(**enc).logits
-    pred_id = int(logits.argmax(dim=-1).item())
-    return RISK_LABELS[pred_id], RECOMMENDATIONS[RISK_LABELS[pred_id]]
+    if device is None:
+        device = next(model.parameters()).device
+    # No fixed-length padding: pad to the longest text, then trim each batch to its own longest row
+    enc = tokenizer(texts, return_tensors="pt", padding="longest", truncation=True, max_length=max_length)
+    lengths = enc["attention_mask"].sum(dim=1).tolist()
+    pin = device.type == "cuda"
+    enc = {k: (v.pin_memory() if pin else v).to(device, non_blocking=pin) for k, v in enc.items()}
+    pred_ids = []
+    with torch.inference_mode(), torch.autocast(device_type=device.type, dtype=torch.float16, enabled=device.type == "cuda"):
+        for i in range(0, len(texts), batch_size):
+            seq_len = max(lengths[i : i + batch_size])
+            logits = model(**{k: v[i : i + batch_size, :seq_len] for k, v in enc.items()}).logits
+            pred_ids.extend(logits.argmax(dim=-1).tolist())
+    return [(RISK_LABELS[i], RECOMMENDATIONS[RISK_LABELS[i]]) for i in pred_ids]
+
+
+def predict(text: str, model, tokenizer, max_length: int = 64):
+    return predict_batch([text], model, tokenizer, max_length=max_length)[0]
 
 
 def main():
@@ -49,12 +109,16 @@ def main():
         risk, rec = predict(text, model, tokenizer)
         print(f"Risk: {risk}\nRecommendation: {rec}")
     else:
-        for line in sys.stdin:
-            line = line.strip()
-            if not line:
-                continue
-            risk, rec = predict(line, model, tokenizer)
-            print(f"{line[:60]}... -> {risk}: {rec}")
+        # Stream stdin in chunks of STDIN_BATCH lines: one tokenizer call and forward pass per chunk
+        device = next(model.parameters()).device if hasattr(model, "parameters") else None
+        lines = (line.strip() for line in sys.stdin)
+        while True:
+            raw = list(itertools.islice(lines, STDIN_BATCH))
+            if not raw:
+                break
+            chunk = [line for line in raw if line]
+            for line, (risk, rec) in zip(chunk, predict_batch(chunk, model, tokenizer, device=device)):
+                print(f"{line[:60]}... -> {risk}: {rec}", flush=True)
     return 0
 
 
@@ -33,11 +33,12 @@ def main():
     if not MODEL_DIR.exists():
         print(f"Model not found at {MODEL_DIR}. Run: python ml/finetune_mobilebert_health.py", file=sys.stderr)
         return 1
-    from predict_health_risk import load_model_and_tokenizer, predict, RISK_LABELS, RECOMMENDATIONS
+    from predict_health_risk import load_model_and_tokenizer, predict_batch, RISK_LABELS, RECOMMENDATIONS
     model, tokenizer = load_model_and_tokenizer(MODEL_DIR)
+    # One tokenizer call and one forward pass for all examples
+    results = predict_batch([text for _, text in EXAMPLES], model, tokenizer)
     print("Risk level examples (expected → predicted)\n" + "=" * 60)
-    for expected, text in EXAMPLES:
-        risk, rec = predict(text, model, tokenizer)
+    for (expected, text), (risk, rec) in zip(EXAMPLES, results):
         match = "✓" if risk == expected else "→"
         print(f"\n[{expected.upper()}] {match} predicted: {risk}")
         print(f"  Input: {text[:70]}...")
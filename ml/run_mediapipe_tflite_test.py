@@ -3,13 +3,17 @@
 Run the MediaPipe-style TFLite model (3 inputs) on example texts and print all 3 scores.
 Use this to verify the model is not always predicting green before deploying to Android.
 
-Usage: python ml/run_mediapipe_tflite_test.py
+Usage:
+  python ml/run_mediapipe_tflite_test.py
+  python ml/run_mediapipe_tflite_test.py --numpy_probe   # also score with the numpy reference and diff
 """
+import argparse
 from pathlib import Path
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
 TFLITE_DIR = REPO_ROOT / "ml" / "tflite"
 MODEL_PATH = TFLITE_DIR / "model.tflite"
+PROBE_WEIGHTS = TFLITE_DIR / "probe_weights.npz"  # written by export_to_tflite.py --for_mediapipe
 MAX_LEN = 64
 RISK_LABELS = ["green", "yellow", "red"]
 
@@ -20,7 +24,22 @@ EXAMPLES = [
 ]
 
 
+def numpy_probe(ids, weights_path: Path):
+    """Same forward pass as the exported model in plain numpy: embedding mean -> relu dense -> dense -> softmax."""
+    import numpy as np
+    w = np.load(weights_path)
+    x = w["emb"][ids].mean(axis=1)
+    x = np.maximum(0, x @ w["w1"] + w["b1"])
+    logits = x @ w["w2"] + w["b2"]
+    e = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return e / e.sum(axis=1, keepdims=True)
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Check the MediaPipe-style TFLite model on example texts")
+    parser.add_argument("--numpy_probe", action="store_true", help="Also score with the numpy reference from probe_weights.npz")
+    args = parser.parse_args()
+
     if not MODEL_PATH.exists():
         print(f"Model not found: {MODEL_PATH}")
         print("Run: python ml/export_to_tflite.py --for_mediapipe")
@@ -34,41 +53,52 @@ def main():
         return 1
 
     interp = tf.lite.Interpreter(model_path=str(MODEL_PATH))
-    interp.allocate_tensors()
     input_details = interp.get_input_details()
     output_details = interp.get_output_details()
 
     tokenizer = AutoTokenizer.from_pretrained(str(TFLITE_DIR))
+    # All examples in one tokenizer call and one invoke (batch dim resized to len(EXAMPLES))
+    enc = tokenizer(
+        [text for _, text in EXAMPLES],
+        return_tensors="np",
+        padding="max_length",
+        truncation=True,
+        max_length=MAX_LEN,
+    )
+    ids = enc["input_ids"].astype(np.int32)
+    mask = enc["attention_mask"].astype(np.int32)
+    seg = enc.get("token_type_ids", np.zeros_like(ids)).astype(np.int32)
+    for det in input_details:
+        interp.resize_tensor_input(det["index"], list(ids.shape))
+    interp.allocate_tensors()
+    # Order in model: ids, segment_ids, mask (from get_input_details())
+    for det in input_details:
+        name = det.get("name", "")
+        if "ids" in name and "segment" not in name:
+            interp.set_tensor(det["index"], ids)
+        elif "segment" in name:
+            interp.set_tensor(det["index"], seg)
+        elif "mask" in name:
+            interp.set_tensor(det["index"], mask)
+    interp.invoke()
+    outs = interp.get_tensor(output_details[0]["index"])
+
     print("Model output shape (expect probabilities, sum=1):")
     print()
-    for expected, text in EXAMPLES:
-        enc = tokenizer(
-            text,
-            return_tensors="np",
-            padding="max_length",
-            truncation=True,
-            max_length=MAX_LEN,
-        )
-        ids = enc["input_ids"].astype(np.int32)
-        mask = enc["attention_mask"].astype(np.int32)
-        seg = enc.get("token_type_ids", np.zeros_like(ids)).astype(np.int32)
-        # Order in model: ids, segment_ids, mask (from get_input_details())
-        for i, det in enumerate(input_details):
-            name = det.get("name", "")
-            if "ids" in name and "segment" not in name:
-                interp.set_tensor(det["index"], ids)
-            elif "segment" in name:
-                interp.set_tensor(det["index"], seg)
-            elif "mask" in name:
-                interp.set_tensor(det["index"], mask)
-        interp.invoke()
-        out = interp.get_tensor(output_details[0]["index"])[0]
+    for (expected, _), out in zip(EXAMPLES, outs):
         pred_id = int(np.argmax(out))
         pred_label = RISK_LABELS[pred_id]
         ok = "OK" if pred_label == expected else "MISMATCH"
         scores = " ".join(f"{RISK_LABELS[i]}={out[i]:.3f}" for i in range(3))
         print(f"  Expected {expected} -> {pred_label} ({ok})  [{scores}] sum={out.sum():.3f}")
     print()
+    if args.numpy_probe:
+        if not PROBE_WEIGHTS.exists():
+            print(f"No {PROBE_WEIGHTS}; re-run: python ml/export_to_tflite.py --for_mediapipe")
+            return 1
+        ref = numpy_probe(ids, PROBE_WEIGHTS)
+        agree = int((ref.argmax(axis=1) == outs.argmax(axis=1)).sum())
+        print(f"numpy probe: max |TFLite - numpy| = {np.abs(ref - outs).max():.2e}, argmax agrees {agree}/{len(EXAMPLES)}")
     return 0
 
 
@@ -5,13 +5,17 @@ Run inference using the exported TFLite model (for testing before mobile deploym
 Requires: tensorflow or tflite_runtime, transformers (for tokenizer).
 Usage: python ml/run_tflite_inference.py "HR average 88 bpm HR max 105 steps 5000"
 """
+import json
+import os
 import sys
 from pathlib import Path
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
 TFLITE_DIR = REPO_ROOT / "ml" / "tflite"
 MODEL_PATH = TFLITE_DIR / "health_risk_classifier.tflite"
+VOCAB_MAP_JSON = TFLITE_DIR / "vocab_map.json"  # written when the Keras export prunes its vocab
 MAX_LEN = 64
+XNNPACK_DELEGATE_LIB = "libtensorflowlite_xnnpack_delegate.so"
 RISK_LABELS = ["green", "yellow", "red"]
 RECOMMENDATIONS = {
     "green": "Continue normal activity. Stay hydrated.",
@@ -20,6 +24,20 @@ RECOMMENDATIONS = {
 }
 
 
+def make_interpreter(interpreter_cls, load_delegate, model_path: Path):
+    """Interpreter on all cores, with the XNNPACK delegate library when it can be loaded.
+    Without it, the default op resolver still applies XNNPACK to supported float ops.
+    load_delegate: tf.lite.experimental.load_delegate or tflite_runtime.interpreter.load_delegate."""
+    kwargs = {"model_path": str(model_path), "num_threads": os.cpu_count()}
+    try:
+        delegate = load_delegate(XNNPACK_DELEGATE_LIB)
+    except (ValueError, OSError):
+        delegate = None
+    if delegate is not None:
+        return interpreter_cls(**kwargs, experimental_delegates=[delegate])
+    return interpreter_cls(**kwargs)
+
+
 def main():
     if not MODEL_PATH.exists():
         print(f"TFLite model not found: {MODEL_PATH}")
@@ -33,11 +51,11 @@ def main():
         return 1
     try:
         import tensorflow as tf
-        interp = tf.lite.Interpreter(model_path=str(MODEL_PATH))
+        interp = make_interpreter(tf.lite.Interpreter, tf.lite.experimental.load_delegate, MODEL_PATH)
     except Exception:
         try:
             import tflite_runtime.interpreter as tflite
-            interp = tflite.Interpreter(model_path=str(MODEL_PATH))
+            interp = make_interpreter(tflite.Interpreter, tflite.load_delegate, MODEL_PATH)
         except ImportError:
             print("Install tensorflow or tflite_runtime")
             return 1
@@ -50,6 +68,12 @@ def main():
     text = " ".join(sys.argv[1:]) if len(sys.argv) > 1 else "HR average 82 bpm HR max 105 steps 2276 active 17 minutes"
     enc = tokenizer(text, return_tensors="np", padding="max_length", truncation=True, max_length=MAX_LEN)
     input_ids = enc["input_ids"].astype(np.int32)
+    if VOCAB_MAP_JSON.exists():
+        # Tokenizer ids -> rows of the pruned embedding; unseen tokens use the [UNK] row
+        vmap = json.loads(VOCAB_MAP_JSON.read_text())
+        old_ids = np.asarray(vmap["old_ids"], dtype=np.int32)
+        pos = np.minimum(np.searchsorted(old_ids, input_ids), len(old_ids) - 1)
+        input_ids = np.where(old_ids[pos] == input_ids, pos, vmap["unk_id"]).astype(np.int32)
 
     interp.set_tensor(input_details[0]["index"], input_ids)
     interp.invoke()
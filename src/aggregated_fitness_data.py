@@ -1,43 +1,26 @@
 import pandas as pd
-from datetime import datetime
-import re
-
-def extract_number_after_colon(value_str):
-    """Extract number after first ':'."""
-    if pd.isna(value_str): return 0
-    match = re.search(r':(\d+)', str(value_str))
-    return int(match.group(1)) if match else 0
 
 def clean_fitness_data(filename):
-    df = pd.read_csv(filename, on_bad_lines='skip', engine='python')
+    # C engine; no usecols, which would make it keep rows with extra fields that the skip drops
+    df = pd.read_csv(filename, on_bad_lines='skip', dtype={'Tag': 'category', 'Key': 'category', 'Value': 'string'})
     df['Time'] = pd.to_numeric(df['Time'], errors='coerce')
-    df['Date'] = pd.to_numeric(df['Time'], errors='coerce').apply(
-        lambda x: datetime.utcfromtimestamp(int(x)).strftime('%Y-%m-%d') if pd.notna(x) else None
-    )
+    df['Date'] = pd.to_datetime(df['Time'], unit='s', errors='coerce', utc=True).dt.strftime('%Y-%m-%d')
     
     # Filter ONLY daily+AF8-report data
-    report_data = df[df['Tag'] == 'daily+AF8-report'].copy()
+    report_data = df[df['Tag'] == 'daily+AF8-report']
     
     # Create clean column names
     result = pd.DataFrame(index=pd.unique(report_data['Date']))
     
-    # STAND COUNTS
-    stand_df = report_data[report_data['Key'] == 'valid+AF8-stand'].copy()
-    stand_df['Stand Count'] = stand_df['Value'].apply(extract_number_after_colon)
-    stand_summary = stand_df.groupby('Date')['Stand Count'].first()
-    result['Stand Count'] = stand_summary
-    
-    # INTENSITY 
-    intensity_df = report_data[report_data['Key'] == 'intensity'].copy()
-    intensity_df['Intensity Min'] = intensity_df['Value'].apply(extract_number_after_colon)
-    intensity_summary = intensity_df.groupby('Date')['Intensity Min'].first()
-    result['Intensity Min'] = intensity_summary
-    
-    # CALORIES
-    calories_df = report_data[report_data['Key'] == 'calories'].copy()
-    calories_df['Calories'] = calories_df['Value'].apply(extract_number_after_colon)
-    calories_summary = calories_df.groupby('Date')['Calories'].first()
-    result['Calories'] = calories_summary
+    def col(key, name):
+        """First number after ':' in Value for rows with this Key, first row per Date."""
+        sub = report_data[report_data['Key'] == key]
+        vals = sub['Value'].astype(str).str.extract(r':(\d+)', expand=False).fillna(0).astype(int)
+        return sub.assign(**{name: vals}).groupby('Date')[name].first()
+    
+    result['Stand Count'] = col('valid+AF8-stand', 'Stand Count')
+    result['Intensity Min'] = col('intensity', 'Intensity Min')
+    result['Calories'] = col('calories', 'Calories')
     
     return result.fillna(0).astype(int).sort_index()
 
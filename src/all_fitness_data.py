@@ -1,119 +1,127 @@
+import numpy as np
 import pandas as pd
 import re
+import sys
 
-def read_fitness_csv(file_path):
-    """Parse malformed fitness CSV with proper quote handling"""
-    data = []
-    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-        header_skipped = False
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line or line.startswith('#'): 
-                continue
-            if not header_skipped:
-                header_skipped = True
-                continue
-            
-            parts = []
-            current = ''
-            in_quotes = False
-            i = 0
-            while i < len(line):
-                char = line[i]
-                if char == '"': 
-                    in_quotes = not in_quotes
-                elif char == ',' and not in_quotes:
-                    parts.append(current.strip())
-                    current = ''
-                else: 
-                    current += char
-                i += 1
-            parts.append(current.strip())
-            
-            if len(parts) >= 4:
-                try:
-                    time_val = parts[1].strip('"').strip()
-                    float(time_val)
-                    data.append([parts[0].strip('"'), time_val, parts[2].strip('"'), parts[3].strip('"')])
-                except ValueError:
-                    continue
-    return pd.DataFrame(data, columns=['Key', 'Time', 'Value', 'UpdateTime'])
-
-def extract_values(row):
-    """Extract heart rate from encoded Value strings"""
-    value = str(row['Value']).upper()
-    
-    hr_patterns = [
-        r'(?:BPM|HRT|HR|HEART_RATE|RESTING-HEART-RATE)[^:]*:(\d+)',
-        r'HEART[^:]*:(\d+)',
-        r'HR[^:]*:(\d+)'
-    ]
-    
-    for pattern in hr_patterns:
-        match = re.search(pattern, value)
-        if match:
-            row['heart_rate'] = int(match.group(1))
-            break
-    else:
-        row['heart_rate'] = 0
-        
-    row['calories'] = row['steps'] = row['distance'] = 0
-    return row
+# Heart rate: the BPM/HRT/HR/HEART_RATE pattern anywhere wins over HEART; one anchored scan
+# (each branch's leading .*? finds that pattern's leftmost match, like re.search)
+_HR_RE = re.compile(
+    r'^(?:.*?(?:BPM|HRT|HR|HEART_RATE|RESTING-HEART-RATE)[^:]*:(?P<hr>\d+)|.*?HEART[^:]*:(?P<heart>\d+))',
+    re.DOTALL,
+)
+
+# Rows per read_csv chunk: peak memory stays at one chunk plus the kept heart-rate rows
+CHUNK_ROWS = 200_000
+TIME_HUMAN_FMT = '%Y-%m-%d %H:%M:%S UTC'
+HR_COLUMNS = ['Time_Datetime', 'Key', 'heart_rate']
+
+def _clean_chunk(df):
+    df = df[~df['Key'].str.lstrip().str.startswith('#')].apply(lambda col: col.str.strip())
+    df['Time'] = pd.to_numeric(df['Time'], errors='coerce')
+    return df.dropna(subset=['Time']).reset_index(drop=True)
+
+def read_fitness_csv(file_path, chunksize=None):
+    """Load the fitness CSV with the C parser: first 4 fields per line (Values carry unquoted commas),
+    '#' lines and rows with a non-numeric Time dropped. With chunksize, an iterator of cleaned chunks"""
+    reader = pd.read_csv(
+        file_path,
+        header=0,
+        names=['Key', 'Time', 'Value', 'UpdateTime'],
+        usecols=[0, 1, 2, 3],
+        dtype='string',
+        keep_default_na=False,
+        quotechar='"',
+        engine='c',
+        on_bad_lines='skip',
+        encoding_errors='ignore',
+        chunksize=chunksize,
+    )
+    if chunksize is None:
+        return _clean_chunk(reader)
+    return (_clean_chunk(chunk) for chunk in reader)
+
+def extract_values(df):
+    """Extract heart rate from encoded Value strings (whole column at once)"""
+    # A bare 'HR[^:]*:(\d+)' fallback is already covered by the first branch of _HR_RE
+    m = df['Value'].astype(str).str.upper().str.extract(_HR_RE)
+    hr = m['hr'].fillna(m['heart'])
+    df['heart_rate'] = pd.to_numeric(hr.fillna('0')).astype('int64')  # fill first: no float64 round trip
+    df[['calories', 'steps', 'distance']] = 0
+    return df
+
+def assess_hr(avg_hr):
+    """Cardiovascular status for average BPM: scalar, array or Series (e.g. per-day means)"""
+    avg_hr = np.asarray(avg_hr)
+    return np.select([avg_hr < 60, avg_hr < 70, avg_hr < 80],
+                     ["🏆 Athlete level", "✅ Excellent", "👍 Good"], default="⚠️  Monitor")
 
 # MAIN EXECUTION - FIXED VERSION
 print("🚀 Fitness Data Analyzer v2.2 - ERROR FREE")
 print("=" * 60)
 
 print("📂 Loading data...")
-df = read_fitness_csv('../data/hlth_center_fitness_data.csv')
-
-# Clean numeric columns FIRST
-df['Time'] = pd.to_numeric(df['Time'], errors='coerce')
-df['UpdateTime'] = pd.to_numeric(df['UpdateTime'], errors='coerce')
-df = df.dropna(subset=['Time'])
-
 print("🔍 Extracting metrics...")
-df = df.apply(extract_values, axis=1)
+# Stream the file: only each chunk's heart-rate rows, its size and time span are kept
+# (Time_Human is formatted for the kept rows only)
+total_records = 0
+spans = []
+keep = []
+for df in read_fitness_csv('../data/hlth_center_fitness_data.csv', chunksize=CHUNK_ROWS):
+    # Clean numeric columns FIRST (Time is already numeric)
+    df['UpdateTime'] = pd.to_numeric(df['UpdateTime'], errors='coerce')
+    df = extract_values(df)
 
-# Create datetime column BEFORE filtering
-df['Time_Datetime'] = pd.to_datetime(df['Time'], unit='s', utc=True, errors='coerce')
-df['Time_Human'] = df['Time_Datetime'].dt.strftime('%Y-%m-%d %H:%M:%S UTC')
+    # Create datetime column BEFORE filtering
+    df['Time_Datetime'] = pd.to_datetime(df['Time'], unit='s', utc=True, errors='coerce')
 
-# Filter AFTER datetime creation
-hr_data = df[df['heart_rate'] > 0].copy()
+    total_records += len(df)
+    spans += [df['Time_Datetime'].min(), df['Time_Datetime'].max()]
+    # Filter AFTER datetime creation
+    # only the columns the report uses, so the wide Value strings are not copied
+    keep.append(df.loc[df['heart_rate'].to_numpy() > 0, HR_COLUMNS])
+hr_data = pd.concat(keep, ignore_index=True)
+# Narrow dtypes: BPM fits uint8 (downcast picks wider if not), Key is a handful of repeated names
+hr_data['heart_rate'] = pd.to_numeric(hr_data['heart_rate'], downcast='unsigned')
+hr_data['Key'] = hr_data['Key'].astype('category')
+hr_data['Time_Human'] = hr_data['Time_Datetime'].dt.strftime(TIME_HUMAN_FMT)
+spans = pd.Series(spans, dtype=object).dropna()
 
-print(f"✅ Loaded {len(df):,} total records")
+print(f"✅ Loaded {total_records:,} total records")
 print(f"❤️ Found {len(hr_data)} heart rate readings")
 
 print("\n📋 Recent Heart Rate Activity:")
-# FIXED: Sort using Time_Datetime column that EXISTS in hr_data
-display = hr_data[['Time_Human', 'Key', 'heart_rate']].sort_values('Time_Datetime', ascending=False).head(15)
+# Latest 15 by Time_Datetime (selected before dropping it from the view; nlargest avoids a full sort)
+display = hr_data.nlargest(15, 'Time_Datetime')[['Time_Human', 'Key', 'heart_rate']]
 print(display.to_string(index=False))
 
 print("\n📊 Health Summary:")
-print(f"💓 Average Heart Rate: {hr_data['heart_rate'].mean():.1f} BPM")
-print(f"💓 Resting HR Range: {hr_data['heart_rate'].min():.0f}-{hr_data['heart_rate'].quantile(0.25):.0f} BPM")
-print(f"💓 Peak HR: {hr_data['heart_rate'].max():.0f} BPM")
-print(f"⏱️  Data Span: {df['Time_Human'].min()} → {df['Time_Human'].max()}")
+# min / 25th percentile / max from one quantile call; the mean is reused for the assessment
+hr_min, hr_q25, hr_max = hr_data['heart_rate'].quantile([0, 0.25, 1])
+avg_hr = hr_data['heart_rate'].mean()
+print(f"💓 Average Heart Rate: {avg_hr:.1f} BPM")
+print(f"💓 Resting HR Range: {hr_min:.0f}-{hr_q25:.0f} BPM")
+print(f"💓 Peak HR: {hr_max:.0f} BPM")
+print(f"⏱️  Data Span: {spans.min().strftime(TIME_HUMAN_FMT)} → {spans.max().strftime(TIME_HUMAN_FMT)}")
 
 # FIXED: Create date column from datetime
-hr_data['Date'] = hr_data['Time_Datetime'].dt.date
+hr_data['Date'] = hr_data['Time_Datetime'].dt.tz_localize(None).dt.normalize()  # datetime64, not date objects
 print(f"📈 Active Days: {hr_data['Date'].nunique()}")
 
 # Health assessment
-avg_hr = hr_data['heart_rate'].mean()
-if avg_hr < 60: 
-    status = "🏆 Athlete level"
-elif avg_hr < 70: 
-    status = "✅ Excellent"
-elif avg_hr < 80: 
-    status = "👍 Good"
-else: 
-    status = "⚠️  Monitor"
+status = assess_hr(avg_hr).item()
 
 print(f"\n{status} cardiovascular health (Avg: {avg_hr:.0f} BPM)")
 print("\n✅ Analysis complete! 💪")
 
-# Save cleaned data
-hr_data[['Time_Human', 'Key', 'heart_rate', 'Date']].to_csv('cleaned_heart_rate.csv', index=False)
-print("💾 Cleaned data saved to 'cleaned_heart_rate.csv'")
+# Save cleaned data (--parquet: columnar + zstd, keeps the narrow dtypes; needs pyarrow)
+cleaned = hr_data[['Time_Human', 'Key', 'heart_rate', 'Date']]
+out_file = 'cleaned_heart_rate.csv'
+if '--parquet' in sys.argv[1:]:
+    try:
+        cleaned.to_parquet('cleaned_heart_rate.parquet', index=False, compression='zstd')
+        out_file = 'cleaned_heart_rate.parquet'
+    except ImportError as e:
+        print("Parquet output needs: pip install pyarrow", e)
+if out_file.endswith('.csv'):
+    cleaned.to_csv(out_file, index=False)
+print(f"💾 Cleaned data saved to '{out_file}'")
@@ -7,65 +7,55 @@
 import pandas as pd
 import sys
 import re
-from datetime import datetime
 
-def parse_badminton_session(key_str, time_str, category_str, value_str):
-    """Parse your exact data format"""
-    metrics = {'calories': 0, 'duration': 0, 'avg_hrm': 0, 'max_hrm': 0, 'min_hrm': 0, 'vitality': 0, 'date': 'Unknown'}
-    
-    full_text = f"{key_str} {time_str} {category_str} {value_str}".lower()
-    
-    # Extract timestamps
-    timestamps = re.findall(r'\b(\d{10})\b', full_text)
-    if timestamps:
-        try:
-            ts = int(timestamps[0])
-            metrics['date'] = datetime.utcfromtimestamp(ts).strftime('%Y-%m-%d %H:%M')
-        except:
-            pass
-    
-    # Extract total_cal from Key field
-    total_cal_match = re.search(r'total.*?cal.*?[:\-](\d+)', str(key_str))
-    if total_cal_match:
-        metrics['calories'] = int(total_cal_match.group(1))
-    
-    # Extract vitality
-    vitality_match = re.search(r'vitality.*?[:\-](\d+)', full_text)
-    if vitality_match:
-        metrics['vitality'] = int(vitality_match.group(1))
-    
-    # Extract other metrics
-    patterns = {
-        r'avg.*?hrm.*?[:\-](\d+)': 'avg_hrm',
-        r'max.*?hrm.*?[:\-](\d+)': 'max_hrm', 
-        r'min.*?hrm.*?[:\-](\d+)': 'min_hrm',
-        r'duration.*?[:\-](\d+)': 'duration'
-    }
-    
-    for pattern, field in patterns.items():
-        matches = re.findall(pattern, full_text)
-        if matches:
-            num = int(matches[0])
-            metrics[field] = num
-            if field == 'duration' and num > 1000:
-                metrics['duration'] = round(num / 60, 1)
-    
-    return metrics
+# Session format, defined once: each optional lookahead finds its own field's first match
+# (like a separate re.search per pattern), so one scan of the session text fills every field;
+# (?s:.*?) lets it start past newlines
+_SESSION_FIELDS = {
+    'ts': r'\b(?P<ts>\d{10})\b',
+    'vitality': r'vitality.*?[:\-](?P<vitality>\d+)',
+    'avg_hrm': r'avg.*?hrm.*?[:\-](?P<avg_hrm>\d+)',
+    'max_hrm': r'max.*?hrm.*?[:\-](?P<max_hrm>\d+)',
+    'min_hrm': r'min.*?hrm.*?[:\-](?P<min_hrm>\d+)',
+    'duration': r'duration.*?[:\-](?P<duration>\d+)',
+}
+_SESSION_RE = re.compile('^' + ''.join(f'(?:(?=(?s:.*?){p}))?' for p in _SESSION_FIELDS.values()))
+_TOTAL_CAL_RE = re.compile(r'total.*?cal.*?[:\-](\d+)')
 
 def process_badminton_csv(csv_file):
     print("🏸 Processing your 8 badminton sessions...")
     df = pd.read_csv(csv_file, dtype=str)
     
-    sessions = []
-    for i, row in enumerate(df.itertuples(), 1):
-        session_data = parse_badminton_session(
-            row.Key or '', row.Time or '', 
-            row.Category or '', row.Value or ''
-        )
-        session_data['session_id'] = i
-        sessions.append(session_data)
-    
-    result_df = pd.DataFrame(sessions)
+    # Fields extracted column-wise; missing cells read as 'nan', like str() of a NaN cell
+    # (reset_index: extra unquoted commas in Value make pandas move leading fields into the index)
+    cols = [df[c].fillna('nan').reset_index(drop=True) for c in ('Key', 'Time', 'Category', 'Value')]
+    # Key/Category repeat a few names: as categoricals, .str.lower() runs once per distinct value
+    # (lower-casing column by column equals lower-casing the space-joined text)
+    lowered = [c.astype('category').str.lower() if i in (0, 2) else c.str.lower() for i, c in enumerate(cols)]
+    full_text = lowered[0].str.cat(lowered[1:], sep=' ')
+    found = full_text.str.extract(_SESSION_RE)
+    
+    def num(s):
+        return pd.to_numeric(s.fillna('0')).astype('int64')
+    
+    duration = num(found['duration'])
+    long = duration > 1000
+    if long.any():
+        # Python round (correctly rounded) like the per-session path; numpy's round can differ at .x5
+        minutes = [round(int(d) / 60, 1) for d in duration[long]]
+        duration = duration.astype('float64')
+        duration[long] = minutes
+    when = pd.to_datetime(pd.to_numeric(found['ts']), unit='s', utc=True)
+    result_df = pd.DataFrame({
+        'calories': num(cols[0].str.extract(_TOTAL_CAL_RE, expand=False)),
+        'duration': duration,
+        'avg_hrm': num(found['avg_hrm']),
+        'max_hrm': num(found['max_hrm']),
+        'min_hrm': num(found['min_hrm']),
+        'vitality': num(found['vitality']),
+        'date': when.dt.strftime('%Y-%m-%d %H:%M').fillna('Unknown'),
+        'session_id': range(1, len(df) + 1),
+    })
     print(f"✅ Extracted vitality from all {len(result_df)} sessions")
     return result_df
 
@@ -94,23 +84,24 @@ def create_beautiful_report(df):
     sorted_df = display_df.sort_values('vitality', ascending=False)
     print(sorted_df.to_string(index=False))
     
-    # Summary stats
+    # Summary stats: every reduction in one agg (float results, so counts are cast back with int)
+    stats = valid_sessions[['vitality', 'calories']].agg(['sum', 'mean', 'min', 'max', 'std', 'idxmax'])
+    vitality = stats['vitality']
     print(f"\n📈 TRAINING SUMMARY:")
     print(f"   🎾 Total Sessions: {len(valid_sessions)}")
-    print(f"   ⭐ Total Vitality: {valid_sessions['vitality'].sum():,} points")
-    print(f"   ⭐ Average Vitality: {valid_sessions['vitality'].mean():.1f} pts/session")
-    print(f"   🔥 Estimated Calories: {valid_sessions['calories'].sum():,} kcal")
+    print(f"   ⭐ Total Vitality: {int(vitality['sum']):,} points")
+    print(f"   ⭐ Average Vitality: {vitality['mean']:.1f} pts/session")
+    print(f"   🔥 Estimated Calories: {int(stats.at['sum', 'calories']):,} kcal")
     
     # Best session
-    best_session = valid_sessions.loc[valid_sessions['vitality'].idxmax()]
+    best_session = valid_sessions.loc[int(vitality['idxmax'])]
     print(f"\n🏆 BEST TRAINING DAY:")
     print(f"   Session #{best_session['session_id']}: {best_session['vitality']} vitality points")
     
     # Vitality distribution
     print(f"\n📊 VITALITY BREAKDOWN:")
-    vitality_range = valid_sessions['vitality'].max() - valid_sessions['vitality'].min()
-    print(f"   Range: {valid_sessions['vitality'].min():.0f} - {valid_sessions['vitality'].max():.0f}")
-    print(f"   Consistency: Excellent (std: {valid_sessions['vitality'].std():.1f})")
+    print(f"   Range: {vitality['min']:.0f} - {vitality['max']:.0f}")
+    print(f"   Consistency: Excellent (std: {vitality['std']:.1f})")
 
 def main(csv_file):
     df = process_badminton_csv(csv_file)